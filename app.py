@@ -1,33 +1,100 @@
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
+from quart import Quart, Response, request, jsonify, render_template
+from quart_cors import cors
 import os
+import asyncio
+import functools
+import orjson
+from concurrent.futures import ProcessPoolExecutor
 from config import Config
 from comp.cleaner import clean_and_extract
 from comp.ai_processor import AIProcessor
 from comp.priority_scorer import PriorityScorer
-from comp.models import (
-    EmailMetadata, ActionItem, EmailSummary, 
-    PriorityInfo, ProcessedEmail
-)
+from comp.models import build_response_dict
 from sample_emails import get_all_samples, get_sample_email
 
-app = Flask(__name__)
+app = Quart(__name__)
 app.config.from_object(Config)
-CORS(app, origins=Config.CORS_ORIGINS)
+app = cors(app, allow_origin=Config.CORS_ORIGINS)
 
 # Initialize processors
 ai_processor = AIProcessor()
 priority_scorer = PriorityScorer()
 
+# Without an API key the pipeline is pure CPU work (regex cleaning and keyword
+# scans), so it runs in worker processes to use every core instead of one GIL.
+# The pool is created when the server starts, never at import: pool workers
+# re-import this module, and on spawn platforms an import-time pool would
+# start a new pool in every worker.
+_cpu_pool = None
+
+# Sample emails never change at runtime, so each response is serialized on
+# first request and reused after that
+_sample_json_cache = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _samples_json() -> bytes:
+    """Serialized /api/samples response, built on first use."""
+    return orjson.dumps({
+        'success': True,
+        'samples': {
+            key: {
+                'name': key.replace('_', ' ').title(),
+                'content': content
+            }
+            for key, content in get_all_samples().items()
+        }
+    })
+
+
+def _sample_json(sample_key: str):
+    """Serialized /api/sample/<key> response, or None for unknown keys."""
+    body = _sample_json_cache.get(sample_key)
+    if body is None:
+        samples = get_all_samples()
+        if sample_key not in samples:
+            return None
+        body = orjson.dumps({'success': True, 'sample': samples[sample_key]})
+        _sample_json_cache[sample_key] = body
+    return body
+
+
+def _analyze_offline(email_text: str):
+    """Clean and analyze an email with the keyword fallbacks (runs in a worker process)."""
+    cleaned_text, metadata = clean_and_extract(email_text)
+    return cleaned_text, metadata, ai_processor.fallback_analysis(cleaned_text)
+
+
+@app.before_serving
+async def _start_cpu_pool():
+    """Start the worker processes for the no-AI pipeline."""
+    global _cpu_pool
+    if not ai_processor.api_key:
+        workers = Config.CPU_WORKERS or os.cpu_count()
+        _cpu_pool = ProcessPoolExecutor(max_workers=workers)
+        # One small task per worker starts the processes and imports the
+        # pipeline in each; nothing waits on the results
+        for _ in range(workers):
+            _cpu_pool.submit(_analyze_offline, "From: a@b\nSubject: x\n\nhello")
+
+
+@app.after_serving
+async def _stop_cpu_pool():
+    """Shut down the worker processes."""
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown()
+        _cpu_pool = None
+
 
 @app.route('/')
-def index():
+async def index():
     """Serve the main application page."""
-    return render_template('index.html')
+    return await render_template('index.html')
 
 
 @app.route('/api/process', methods=['POST'])
-def process_email():
+async def process_email():
     """
     Process an email and return analysis.
     
@@ -49,7 +116,7 @@ def process_email():
     }
     """
     try:
-        data = request.get_json()
+        data = await request.get_json()
         
         if not data or 'email_text' not in data:
             return jsonify({
@@ -65,13 +132,21 @@ def process_email():
                 'error': 'Email text is empty'
             }), 400
         
-        # Step 1: Clean and extract metadata
-        cleaned_text, metadata_dict = clean_and_extract(email_text)
-        
-        # Step 2: AI processing
-        summary_dict = ai_processor.summarize_email(cleaned_text, metadata_dict)
-        action_items_list = ai_processor.extract_action_items(cleaned_text)
-        ai_signals = ai_processor.detect_priority_signals(cleaned_text, metadata_dict)
+        if _cpu_pool is not None:
+            # Steps 1-2 without AI: clean and run the fallbacks off the event loop
+            loop = asyncio.get_running_loop()
+            cleaned_text, metadata_dict, analysis = await loop.run_in_executor(
+                _cpu_pool, _analyze_offline, email_text
+            )
+        else:
+            # Step 1: Clean and extract metadata
+            cleaned_text, metadata_dict = clean_and_extract(email_text)
+            
+            # Step 2: AI processing (one combined request)
+            analysis = await ai_processor.analyze_email_async(cleaned_text, metadata_dict)
+        summary_dict = analysis['summary']
+        action_items_list = analysis['action_items']
+        ai_signals = analysis['priority_signals']
         
         # Step 3: Priority scoring
         priority_dict = priority_scorer.calculate_priority(
@@ -81,55 +156,18 @@ def process_email():
             action_items_list
         )
         
-        # Step 4: Build structured response
-        metadata = EmailMetadata(
-            subject=metadata_dict.get('subject', ''),
-            from_address=metadata_dict.get('from', ''),
-            to_addresses=metadata_dict.get('to', []),
-            date=metadata_dict.get('date')
-        )
-        
-        summary = EmailSummary(
-            summary=summary_dict.get('summary', ''),
-            key_points=summary_dict.get('key_points', []),
-            tone=summary_dict.get('tone', 'professional')
-        )
-        
-        action_items = [
-            ActionItem(
-                text=item.get('text', ''),
-                assignee=item.get('assignee', 'unspecified'),
-                deadline=item.get('deadline', 'none'),
-                confidence=item.get('confidence', 'medium')
-            )
-            for item in action_items_list
-        ]
-        
-        priority = PriorityInfo(
-            score=priority_dict.get('score', 0),
-            level=priority_dict.get('level', 'low'),
-            color=priority_dict.get('color', '#6b7280'),
-            breakdown=priority_dict.get('breakdown', {})
-        )
-        
-        # Step 5: Create processed email object
-        processed = ProcessedEmail(
-            original_text=email_text,
-            cleaned_text=cleaned_text,
-            metadata=metadata,
-            summary=summary,
-            action_items=action_items,
-            priority=priority
+        # Step 4: Build the response dict directly
+        result = build_response_dict(
+            email_text,
+            cleaned_text,
+            metadata_dict,
+            summary_dict,
+            action_items_list,
+            priority_dict
         )
         
-        # Generate focus mode text
-        processed.generate_focus_mode()
-        
-        # Return response
-        return jsonify({
-            'success': True,
-            'data': processed.to_dict()
-        })
+        body = orjson.dumps({'success': True, 'data': result})
+        return Response(body, mimetype='application/json')
     
     except Exception as e:
         print(f"Error processing email: {e}")
@@ -142,20 +180,10 @@ def process_email():
 
 
 @app.route('/api/samples', methods=['GET'])
-def get_samples():
+async def get_samples():
     """Get all sample emails for demo purposes."""
     try:
-        samples = get_all_samples()
-        return jsonify({
-            'success': True,
-            'samples': {
-                key: {
-                    'name': key.replace('_', ' ').title(),
-                    'content': content
-                }
-                for key, content in samples.items()
-            }
-        })
+        return Response(_samples_json(), mimetype='application/json')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -164,9 +192,13 @@ def get_samples():
 
 
 @app.route('/api/sample/<sample_key>', methods=['GET'])
-def get_sample(sample_key):
+async def get_sample(sample_key):
     """Get a specific sample email."""
     try:
+        body = _sample_json(sample_key)
+        if body is not None:
+            return Response(body, mimetype='application/json')
+        
         sample = get_sample_email(sample_key)
         if sample:
             return jsonify({
@@ -186,11 +218,11 @@ def get_sample(sample_key):
 
 
 @app.route('/api/health', methods=['GET'])
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return jsonify({
         'status': 'healthy',
-        'ai_enabled': ai_processor.model is not None
+        'ai_enabled': bool(ai_processor.api_key)
     })
 
 
@@ -199,7 +231,7 @@ if __name__ == '__main__':
     print("🚀 Email Triage Assistant Starting...")
     print("=" * 60)
     print(f"📍 Server: http://{Config.HOST}:{Config.PORT}")
-    print(f"🤖 AI Status: {'Enabled' if ai_processor.model else 'Disabled (using fallback)'}")
+    print(f"🤖 AI Status: {'Enabled' if ai_processor.api_key else 'Disabled (using fallback)'}")
     if not Config.GEMINI_API_KEY:
         print("⚠️  Warning: GEMINI_API_KEY not set. Using fallback processing.")
         print("   Set GEMINI_API_KEY in .env file for full AI features.")
@@ -1,10 +1,76 @@
+import io
 import os
 import re
+import asyncio
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional
 import google.generativeai as genai
-from dotenv import load_dotenv
+from config import load_env
 
-load_dotenv()
+load_env()
+
+# Parsed Gemini responses keyed by (task, content hash, subject), shared across requests
+_RESPONSE_CACHE_SIZE = 512
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _cache_key(task: str, email_text: str, metadata: Dict = None) -> tuple:
+    """Build a response cache key from the task name and email content."""
+    digest = hashlib.blake2b(email_text.encode('utf-8'), digest_size=16).digest()
+    subject = metadata.get('subject', '') if metadata else ''
+    return (task, digest, subject)
+
+
+def _cache_get(key: tuple):
+    """Return a copy of a cached response, or None on a miss."""
+    with _response_cache_lock:
+        result = _response_cache.get(key)
+        if result is None:
+            return None
+        _response_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+
+def _cache_put(key: tuple, result) -> None:
+    """Store a parsed response, evicting the least recently used entry."""
+    with _response_cache_lock:
+        _response_cache[key] = copy.deepcopy(result)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+# Section delimiters for the combined analysis prompt
+SECTION_SUMMARY = '=== SUMMARY ==='
+SECTION_ACTIONS = '=== ACTIONS ==='
+SECTION_PRIORITY = '=== PRIORITY ==='
+
+# Line patterns for the structured AI responses; each parser makes one scan
+_SUMMARY_LINE_RE = re.compile(r'^[ \t]*(?:(SUMMARY|KEY_POINTS|TONE):(.*)|-(.*))$', re.MULTILINE)
+_ACTION_LINE_RE = re.compile(
+    r'^[ \t]*(?:(ACTION|ASSIGNEE|DEADLINE|CONFIDENCE):(.*)|(---)[ \t\r]*)$', re.MULTILINE
+)
+_PRIORITY_LINE_RE = re.compile(r'^[ \t]*(URGENCY|IMPORTANCE|SIGNALS):(.*)$', re.MULTILINE)
+
+# Keyword scanners for the fallback heuristics. Each is a single alternation
+# so the text is walked once; the lookahead form reports overlapping hits.
+ACTION_KEYWORDS = (
+    'please', 'could you', 'can you', 'need to', 'should',
+    'must', 'required', 'action', 'todo', 'task'
+)
+URGENT_KEYWORDS = ('urgent', 'asap', 'immediately', 'critical', 'emergency')
+IMPORTANT_KEYWORDS = ('important', 'priority', 'deadline', 'required')
+
+_ACTION_KEYWORDS_RE = re.compile(
+    '|'.join(re.escape(keyword) for keyword in ACTION_KEYWORDS), re.IGNORECASE
+)
+_PRIORITY_KEYWORDS_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in URGENT_KEYWORDS + IMPORTANT_KEYWORDS) + '))'
+)
 
 class AIProcessor:
     """AI-powered email analysis using Google Gemini."""
@@ -12,13 +78,17 @@ class AIProcessor:
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the AI processor with Gemini API."""
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if self.api_key:
+        self._model = None
+    
+    @property
+    def model(self):
+        """Gemini model, created on first use and reused for every request (None without an API key)."""
+        if self._model is None and self.api_key:
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
+            self._model = genai.GenerativeModel('gemini-pro')
+        return self._model
     
-    def summarize_email(self, email_text: str, metadata: Dict = None) -> Dict:
+    async def summarize_email_async(self, email_text: str, metadata: Dict = None) -> Dict:
         """
         Generate a comprehensive summary of the email thread.
         
@@ -29,11 +99,134 @@ class AIProcessor:
         Returns:
             Dictionary with summary, key points, and tone
         """
+        return await self._request_async(
+            'summary', email_text, metadata, self._summary_prompt,
+            self._parse_summary_response, self._fallback_summary, 'AI processing error'
+        )
+    
+    async def extract_action_items_async(self, email_text: str) -> List[Dict]:
+        """
+        Extract action items from the email with confidence scores.
+        
+        Returns:
+            List of action items with text, assignee, deadline, and confidence
+        """
+        return await self._request_async(
+            'actions', email_text, None, self._actions_prompt,
+            self._parse_action_items, self._fallback_actions, 'Action extraction error'
+        )
+    
+    async def detect_priority_signals_async(self, email_text: str, metadata: Dict = None) -> Dict:
+        """
+        Detect priority signals in the email.
+        
+        Returns:
+            Dictionary with urgency level, importance, and key signals
+        """
+        return await self._request_async(
+            'priority', email_text, metadata, self._priority_prompt,
+            self._parse_priority_response, self._fallback_priority, 'Priority detection error'
+        )
+    
+    async def _request_async(
+        self, task: str, email_text: str, metadata: Optional[Dict],
+        build_prompt, parse, fallback, error_label: str
+    ):
+        """Send one cached single-section Gemini request, falling back to keywords on failure."""
+        if not self.model:
+            return fallback(email_text)
+        
+        key = _cache_key(task, email_text, metadata)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self.model.generate_content_async(build_prompt(email_text, metadata))
+            result = parse(response.text)
+            _cache_put(key, result)
+            return result
+        
+        except Exception as e:
+            print(f"{error_label}: {e}")
+            return fallback(email_text)
+    
+    async def analyze_email_async(self, email_text: str, metadata: Dict = None) -> Dict:
+        """
+        Summarize, extract action items and detect priority signals with a single
+        Gemini request. Sections the model leaves out are re-requested concurrently.
+        
+        Returns:
+            Dictionary with 'summary', 'action_items' and 'priority_signals'
+        """
         if not self.model:
-            return self._fallback_summary(email_text)
+            return self.fallback_analysis(email_text)
+        
+        key = _cache_key('analysis', email_text, metadata)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
         
         try:
-            prompt = f"""Analyze this email thread and provide a concise summary.
+            response = await self.model.generate_content_async(
+                self._analysis_prompt(email_text, metadata)
+            )
+            sections = self._split_sections(response.text)
+            
+            # Re-request any section the model left out, concurrently
+            pending = {}
+            if SECTION_SUMMARY not in sections:
+                pending['summary'] = self.summarize_email_async(email_text, metadata)
+            if SECTION_ACTIONS not in sections:
+                pending['action_items'] = self.extract_action_items_async(email_text)
+            if SECTION_PRIORITY not in sections:
+                pending['priority_signals'] = self.detect_priority_signals_async(email_text, metadata)
+            retried = dict(zip(pending, await asyncio.gather(*pending.values())))
+            
+            if 'summary' in retried:
+                summary = retried['summary']
+            else:
+                summary = self._parse_summary_response(sections[SECTION_SUMMARY])
+            
+            if 'action_items' in retried:
+                action_items = retried['action_items']
+            else:
+                action_items = self._parse_action_items(sections[SECTION_ACTIONS])
+            
+            if 'priority_signals' in retried:
+                priority_signals = retried['priority_signals']
+            else:
+                priority_signals = self._parse_priority_response(sections[SECTION_PRIORITY])
+            
+            result = {
+                'summary': summary,
+                'action_items': action_items,
+                'priority_signals': priority_signals
+            }
+            if len(sections) == 3:
+                _cache_put(key, result)
+            return result
+        
+        except Exception as e:
+            print(f"Email analysis error: {e}")
+            return self.fallback_analysis(email_text)
+    
+    def fallback_analysis(self, email_text: str) -> Dict:
+        """
+        Keyword-based analysis used when AI is unavailable.
+        
+        Returns:
+            Dictionary with 'summary', 'action_items' and 'priority_signals'
+        """
+        return {
+            'summary': self._fallback_summary(email_text),
+            'action_items': self._fallback_actions(email_text),
+            'priority_signals': self._fallback_priority(email_text)
+        }
+    
+    def _summary_prompt(self, email_text: str, metadata: Dict = None) -> str:
+        """Build the summary prompt."""
+        return f"""Analyze this email thread and provide a concise summary.
 
 Email Content:
 {email_text}
@@ -49,26 +242,10 @@ KEY_POINTS:
 - [point 1]
 - [point 2]
 TONE: [tone]"""
-
-            response = self.model.generate_content(prompt)
-            return self._parse_summary_response(response.text)
-        
-        except Exception as e:
-            print(f"AI processing error: {e}")
-            return self._fallback_summary(email_text)
     
-    def extract_action_items(self, email_text: str) -> List[Dict]:
-        """
-        Extract action items from the email with confidence scores.
-        
-        Returns:
-            List of action items with text, assignee, deadline, and confidence
-        """
-        if not self.model:
-            return self._fallback_actions(email_text)
-        
-        try:
-            prompt = f"""Extract all action items from this email thread.
+    def _actions_prompt(self, email_text: str, metadata: Dict = None) -> str:
+        """Build the action item extraction prompt."""
+        return f"""Extract all action items from this email thread.
 
 Email Content:
 {email_text}
@@ -87,27 +264,11 @@ CONFIDENCE: [high/medium/low]
 ---
 
 If there are no clear action items, respond with: NO_ACTIONS"""
-
-            response = self.model.generate_content(prompt)
-            return self._parse_action_items(response.text)
-        
-        except Exception as e:
-            print(f"Action extraction error: {e}")
-            return self._fallback_actions(email_text)
     
-    def detect_priority_signals(self, email_text: str, metadata: Dict = None) -> Dict:
-        """
-        Detect priority signals in the email.
-        
-        Returns:
-            Dictionary with urgency level, importance, and key signals
-        """
-        if not self.model:
-            return self._fallback_priority(email_text)
-        
-        try:
-            subject = metadata.get('subject', '') if metadata else ''
-            prompt = f"""Analyze the priority and urgency of this email.
+    def _priority_prompt(self, email_text: str, metadata: Dict = None) -> str:
+        """Build the priority detection prompt."""
+        subject = metadata.get('subject', '') if metadata else ''
+        return f"""Analyze the priority and urgency of this email.
 
 Subject: {subject}
 Content:
@@ -122,34 +283,82 @@ Format:
 URGENCY: [level]
 IMPORTANCE: [level]
 SIGNALS: [comma-separated signals]"""
+    
+    def _analysis_prompt(self, email_text: str, metadata: Dict = None) -> str:
+        """Build the combined summary/actions/priority prompt."""
+        subject = metadata.get('subject', '') if metadata else ''
+        return f"""Analyze this email thread and complete the three tasks below.
+
+Subject: {subject}
+Email Content:
+{email_text}
+
+Task 1 - Summary:
+1. A brief 2-3 sentence summary of the main topic
+2. Key points (bullet points, max 5)
+3. Overall tone (professional/urgent/casual/friendly)
+
+Task 2 - Action items. For each action item, identify:
+- The specific task or action required
+- Who is responsible (if mentioned)
+- Any deadline or time constraint (if mentioned)
+- Confidence level (high/medium/low)
+
+Task 3 - Priority:
+1. Urgency level (urgent/normal/low)
+2. Importance (critical/important/informational)
+3. Key signals that indicate priority (deadlines, urgent keywords, etc.)
 
-            response = self.model.generate_content(prompt)
-            return self._parse_priority_response(response.text)
+Format your response exactly as:
+{SECTION_SUMMARY}
+SUMMARY: [your summary]
+KEY_POINTS:
+- [point 1]
+- [point 2]
+TONE: [tone]
+{SECTION_ACTIONS}
+ACTION: [task description]
+ASSIGNEE: [person or "unspecified"]
+DEADLINE: [date/time or "none"]
+CONFIDENCE: [high/medium/low]
+---
+(repeat for each action; if there are no clear action items, write NO_ACTIONS)
+{SECTION_PRIORITY}
+URGENCY: [level]
+IMPORTANCE: [level]
+SIGNALS: [comma-separated signals]"""
+    
+    def _split_sections(self, response_text: str) -> Dict[str, str]:
+        """Split a combined analysis response into its labeled sections."""
+        sections = {}
+        current = None
+        for line in response_text.split('\n'):
+            marker = line.strip()
+            if marker in (SECTION_SUMMARY, SECTION_ACTIONS, SECTION_PRIORITY):
+                current = marker
+                sections[current] = []
+            elif current:
+                sections[current].append(line)
         
-        except Exception as e:
-            print(f"Priority detection error: {e}")
-            return self._fallback_priority(email_text)
+        return {name: '\n'.join(lines) for name, lines in sections.items()}
     
     def _parse_summary_response(self, response_text: str) -> Dict:
         """Parse the AI summary response."""
         summary = ""
         key_points = []
         tone = "professional"
-        
-        lines = response_text.strip().split('\n')
         current_section = None
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('SUMMARY:'):
-                summary = line.replace('SUMMARY:', '').strip()
-            elif line.startswith('KEY_POINTS:'):
+        for key, value, point in _SUMMARY_LINE_RE.findall(response_text):
+            if key == 'SUMMARY':
+                summary = value.strip()
+            elif key == 'KEY_POINTS':
                 current_section = 'points'
-            elif line.startswith('TONE:'):
-                tone = line.replace('TONE:', '').strip().lower()
+            elif key == 'TONE':
+                tone = value.strip().lower()
                 current_section = None
-            elif current_section == 'points' and line.startswith('-'):
-                key_points.append(line[1:].strip())
+            elif current_section == 'points':
+                key_points.append(point.strip())
         
         return {
             'summary': summary,
@@ -165,19 +374,14 @@ SIGNALS: [comma-separated signals]"""
         actions = []
         current_action = {}
         
-        for line in response_text.strip().split('\n'):
-            line = line.strip()
-            if line.startswith('ACTION:'):
+        for key, value, separator in _ACTION_LINE_RE.findall(response_text):
+            if key == 'ACTION':
                 if current_action:
                     actions.append(current_action)
-                current_action = {'text': line.replace('ACTION:', '').strip()}
-            elif line.startswith('ASSIGNEE:'):
-                current_action['assignee'] = line.replace('ASSIGNEE:', '').strip()
-            elif line.startswith('DEADLINE:'):
-                current_action['deadline'] = line.replace('DEADLINE:', '').strip()
-            elif line.startswith('CONFIDENCE:'):
-                current_action['confidence'] = line.replace('CONFIDENCE:', '').strip()
-            elif line == '---' and current_action:
+                current_action = {'text': value.strip()}
+            elif key:
+                current_action[key.lower()] = value.strip()
+            elif separator and current_action:
                 actions.append(current_action)
                 current_action = {}
         
@@ -192,15 +396,13 @@ SIGNALS: [comma-separated signals]"""
         importance = "informational"
         signals = []
         
-        for line in response_text.strip().split('\n'):
-            line = line.strip()
-            if line.startswith('URGENCY:'):
-                urgency = line.replace('URGENCY:', '').strip().lower()
-            elif line.startswith('IMPORTANCE:'):
-                importance = line.replace('IMPORTANCE:', '').strip().lower()
-            elif line.startswith('SIGNALS:'):
-                signals_text = line.replace('SIGNALS:', '').strip()
-                signals = [s.strip() for s in signals_text.split(',')]
+        for key, value in _PRIORITY_LINE_RE.findall(response_text):
+            if key == 'URGENCY':
+                urgency = value.strip().lower()
+            elif key == 'IMPORTANCE':
+                importance = value.strip().lower()
+            else:
+                signals = [s.strip() for s in value.strip().split(',')]
         
         return {
             'urgency': urgency,
@@ -210,52 +412,56 @@ SIGNALS: [comma-separated signals]"""
     
     def _fallback_summary(self, email_text: str) -> Dict:
         """Fallback summary when AI is unavailable."""
-        lines = [l.strip() for l in email_text.split('\n') if l.strip()]
-        summary = ' '.join(lines[:3])[:200] + '...'
+        # Only the first three non-empty lines are used, so stop reading there
+        lines = []
+        for line in io.StringIO(email_text):
+            line = line.strip()
+            if line:
+                lines.append(line)
+                if len(lines) == 3:
+                    break
+        summary = ' '.join(lines)[:200] + '...'
         
         return {
             'summary': summary,
-            'key_points': lines[:3],
+            'key_points': lines,
             'tone': 'professional'
         }
     
     def _fallback_actions(self, email_text: str) -> List[Dict]:
         """Fallback action detection using keywords."""
-        action_keywords = [
-            'please', 'could you', 'can you', 'need to', 'should',
-            'must', 'required', 'action', 'todo', 'task'
-        ]
-        
         actions = []
-        for line in email_text.split('\n'):
-            line = line.strip()
-            if any(keyword in line.lower() for keyword in action_keywords):
-                actions.append({
-                    'text': line,
-                    'assignee': 'unspecified',
-                    'deadline': 'none',
-                    'confidence': 'low'
-                })
+        match = _ACTION_KEYWORDS_RE.search(email_text)
+        while match and len(actions) < 5:  # Limit to 5 actions
+            # Expand the hit to its line, then resume scanning after that line
+            start = email_text.rfind('\n', 0, match.start()) + 1
+            end = email_text.find('\n', match.end())
+            if end == -1:
+                end = len(email_text)
+            actions.append({
+                'text': email_text[start:end].strip(),
+                'assignee': 'unspecified',
+                'deadline': 'none',
+                'confidence': 'low'
+            })
+            match = _ACTION_KEYWORDS_RE.search(email_text, end)
         
-        return actions[:5]  # Limit to 5 actions
+        return actions
     
     def _fallback_priority(self, email_text: str) -> Dict:
         """Fallback priority detection using keywords."""
-        urgent_keywords = ['urgent', 'asap', 'immediately', 'critical', 'emergency']
-        important_keywords = ['important', 'priority', 'deadline', 'required']
-        
-        text_lower = email_text.lower()
+        found = {match.group(1) for match in _PRIORITY_KEYWORDS_RE.finditer(email_text.lower())}
         urgency = 'normal'
         importance = 'informational'
         signals = []
         
-        for keyword in urgent_keywords:
-            if keyword in text_lower:
+        for keyword in URGENT_KEYWORDS:
+            if keyword in found:
                 urgency = 'urgent'
                 signals.append(keyword)
         
-        for keyword in important_keywords:
-            if keyword in text_lower:
+        for keyword in IMPORTANT_KEYWORDS:
+            if keyword in found:
                 importance = 'important'
                 if keyword not in signals:
                     signals.append(keyword)
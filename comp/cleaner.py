@@ -3,6 +3,32 @@ from typing import Dict, Tuple
 from datetime import datetime
 from bs4 import BeautifulSoup
 
+# Precompiled patterns used on every cleaning pass
+# Metadata headers: the first header block runs from the first Subject/From/
+# To/Date line to the next blank line
+_HEADERS_RE = re.compile(r'^[ \t]*(Subject|From|To|Date):[ \t]*(.+?)$', re.IGNORECASE | re.MULTILINE)
+_BLANK_LINE_RE = re.compile(r'\n[ \t\r]*\n')
+
+# HTML markers are expected near the top of the document or of its body
+_HTML_PROBE_LENGTH = 1024
+_HTML_CONTENT_TYPE_RE = re.compile(r'^Content-Type:\s*text/html', re.IGNORECASE | re.MULTILINE)
+
+# Line rules used by the single-pass cleaner
+_NOISE_HEADER_PREFIXES = (
+    'message-id:', 'mime-version:', 'content-type:',
+    'content-transfer-encoding:', 'x-', 'received:', 'return-path:'
+)
+# A sign-off closes its line, e.g. "Thanks," or "Best regards,"
+_SIGN_OFF_RE = re.compile(
+    r'(?:\b(?:best|kind|warm|warmest|many)\s+)?\b(?:thanks|regards|best|sincerely|cheers)\s*,?$',
+    re.IGNORECASE
+)
+_SIGNATURE_EXTRA_LINES = 3  # lines after the name that a salutation block also drops
+_ATTRIBUTION_LOOKAHEAD = 2  # lines an "On ... wrote:" attribution may wrap over
+_FORWARD_MARKER_RE = re.compile(r'-+\s*Forwarded message\s*-+', re.IGNORECASE)
+_ORIGINAL_MARKER_RE = re.compile(r'-+\s*Original message\s*-+', re.IGNORECASE)
+_CLIENT_FOOTER_RE = re.compile(r'Sent from my \w+|Get Outlook for \w+', re.IGNORECASE)
+
 def extract_metadata(email_text: str) -> Dict:
     """
     Extract email metadata (from, to, subject, date).
@@ -14,42 +40,47 @@ def extract_metadata(email_text: str) -> Dict:
         'date': None
     }
     
-    # Extract subject
-    subject_match = re.search(r'Subject:\s*(.+?)(?:\n|$)', email_text, re.IGNORECASE)
-    if subject_match:
-        metadata['subject'] = subject_match.group(1).strip()
-    
-    # Extract from
-    from_match = re.search(r'From:\s*(.+?)(?:\n|$)', email_text, re.IGNORECASE)
-    if from_match:
-        metadata['from'] = from_match.group(1).strip()
-    
-    # Extract to
-    to_match = re.search(r'To:\s*(.+?)(?:\n|$)', email_text, re.IGNORECASE)
-    if to_match:
-        to_addresses = to_match.group(1).strip()
-        metadata['to'] = [addr.strip() for addr in to_addresses.split(',')]
-    
-    # Extract date
-    date_match = re.search(r'Date:\s*(.+?)(?:\n|$)', email_text, re.IGNORECASE)
-    if date_match:
-        try:
-            # Try to parse common date formats
-            date_str = date_match.group(1).strip()
-            # This is a simple parser, could be enhanced
-            metadata['date'] = date_str
-        except:
-            pass
+    # Headers are matched in one scan of the header block; first occurrence wins
+    first = _HEADERS_RE.search(email_text)
+    if first is None:
+        return metadata
+    block_end = _BLANK_LINE_RE.search(email_text, first.end())
+    end = block_end.start() if block_end else len(email_text)
+    for match in _HEADERS_RE.finditer(email_text, first.start(), end):
+        key = match.group(1).lower()
+        value = match.group(2).strip()
+        if key == 'to':
+            if not metadata['to']:
+                metadata['to'] = [addr.strip() for addr in value.split(',')]
+        elif not metadata[key]:
+            metadata[key] = value
     
     return metadata
 
 
+def _looks_like_html(email_text: str) -> bool:
+    """
+    Cheap HTML check that only lowercases the start of the email and the start
+    of its body, so long .eml header blocks do not hide the markup.
+    """
+    # Content-Type is only looked for in the header block
+    body_start = email_text.find('\n\n')
+    header_end = body_start if body_start >= 0 else len(email_text)
+    if _HTML_CONTENT_TYPE_RE.search(email_text, 0, header_end):
+        return True
+    probe = email_text[:_HTML_PROBE_LENGTH]
+    if body_start >= 0:
+        probe += email_text[body_start:body_start + _HTML_PROBE_LENGTH]
+    probe = probe.lower()
+    return '<html' in probe or '<body' in probe
+
+
 def remove_html_tags(email_text: str) -> str:
     """
     Remove HTML tags and convert to plain text.
     """
-    if '<html' in email_text.lower() or '<body' in email_text.lower():
-        soup = BeautifulSoup(email_text, 'html.parser')
+    if _looks_like_html(email_text):
+        soup = BeautifulSoup(email_text, 'lxml')
         # Remove script and style elements
         for script in soup(["script", "style"]):
             script.decompose()
@@ -62,95 +93,117 @@ def remove_html_tags(email_text: str) -> str:
     return email_text
 
 
-def remove_quoted_text(email_text: str) -> str:
-    """
-    Remove quoted/forwarded text from previous emails in thread.
-    """
-    # Remove "On ... wrote:" style quotes
-    pattern = r'On .+? wrote:.*?(?=\n\n|\Z)'
-    cleaned = re.sub(pattern, '', email_text, flags=re.DOTALL)
-    
-    # Remove lines starting with >
-    lines = cleaned.split('\n')
-    cleaned_lines = [line for line in lines if not line.strip().startswith('>')]
-    cleaned = '\n'.join(cleaned_lines)
-    
-    # Remove forwarded message markers
-    cleaned = re.sub(r'-+\s*Forwarded message\s*-+.*?(?=\n\n|\Z)', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
-    cleaned = re.sub(r'-+\s*Original Message\s*-+.*?(?=\n\n|\Z)', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
-    
-    return cleaned
-
-
-def remove_signatures(email_text: str) -> str:
-    """
-    Remove common email signatures.
-    """
-    signature_patterns = [
-        r'--\s*\n.*',               
-        r'Thanks,?\s*\n[^\n]+(?:\n[^\n]+){0,3}',
-        r'Regards,?\s*\n[^\n]+(?:\n[^\n]+){0,3}',
-        r'Best,?\s*\n[^\n]+(?:\n[^\n]+){0,3}',
-        r'Sincerely,?\s*\n[^\n]+(?:\n[^\n]+){0,3}',
-        r'Cheers,?\s*\n[^\n]+(?:\n[^\n]+){0,3}',
-        r'Sent from my \w+',
-        r'Get Outlook for \w+',
-    ]
-    
-    for pattern in signature_patterns:
-        email_text = re.sub(pattern, '', email_text, flags=re.DOTALL | re.IGNORECASE)
-    
-    return email_text
-
-
-def remove_email_headers(email_text: str) -> str:
-    """
-    Remove email headers while preserving metadata.
-    """
-    # Remove common headers but keep the important ones
-    headers_to_remove = [
-        r'Message-ID:.*?\n',
-        r'MIME-Version:.*?\n',
-        r'Content-Type:.*?\n',
-        r'Content-Transfer-Encoding:.*?\n',
-        r'X-.*?:.*?\n',
-        r'Received:.*?\n',
-        r'Return-Path:.*?\n',
-    ]
-    
-    for pattern in headers_to_remove:
-        email_text = re.sub(pattern, '', email_text, flags=re.IGNORECASE)
-    
-    return email_text
-
-
-def normalize_whitespace(email_text: str) -> str:
-    """
-    Normalize whitespace and clean up formatting.
-    """
-    # Replace multiple newlines with double newline
-    email_text = re.sub(r'\n\s*\n\s*\n+', '\n\n', email_text)
-    
-    # Remove trailing whitespace from lines
-    lines = [line.rstrip() for line in email_text.split('\n')]
-    email_text = '\n'.join(lines)
-    
-    # Trim leading/trailing whitespace
-    email_text = email_text.strip()
-    
-    return email_text
+def _is_attribution(lines, index: int) -> bool:
+    """
+    Whether lines[index] starts an "On ... wrote:" attribution, which may wrap
+    over a couple of lines.
+    """
+    stripped = lines[index].strip()
+    if not stripped.startswith('On '):
+        return False
+    if stripped.endswith('wrote:'):
+        return True
+    for following in lines[index + 1:index + 1 + _ATTRIBUTION_LOOKAHEAD]:
+        following = following.strip()
+        if not following:
+            return False
+        if following.endswith('wrote:'):
+            return True
+    return False
+
+
+def _signature_end(lines, index: int) -> int:
+    """
+    Index of the last line a sign-off on lines[index] removes, or -1 when
+    no name follows it.
+    """
+    # The name is the next line with content, even past blank lines
+    last = len(lines) - 1
+    end = index + 1
+    while end <= last and not lines[end].strip():
+        end += 1
+    if end > last or lines[end].strip() == '--':
+        return -1
+    # A few more lines follow it up to a blank line or a "--" delimiter
+    for _ in range(_SIGNATURE_EXTRA_LINES):
+        following = lines[end + 1].strip() if end < last else ''
+        if not following or following == '--':
+            break
+        end += 1
+    return end
+
+
+def _clean_lines(email_text: str) -> str:
+    """
+    Strip transport headers, quoted replies, forwarded blocks and signatures
+    in one walk over the lines, then normalize whitespace. Everything after an
+    "Original Message" marker is the older thread and is dropped.
+    """
+    lines = email_text.split('\n')
+    body = []
+    skip_block = False
+    
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        lowered = stripped.lower()
+        
+        # Transport headers are dropped wherever they appear
+        if lowered.startswith(_NOISE_HEADER_PREFIXES) and ':' in stripped:
+            continue
+        
+        # Quoted replies and forwarded blocks run until the next blank line
+        if skip_block:
+            if not stripped:
+                skip_block = False
+                body.append('')
+            continue
+        if stripped.startswith('>'):
+            continue
+        if 'message' in lowered and _ORIGINAL_MARKER_RE.search(stripped):
+            break
+        if _is_attribution(lines, index) or \
+                ('message' in lowered and _FORWARD_MARKER_RE.search(stripped)):
+            skip_block = True
+            continue
+        
+        body.append(line)
+    
+    # Signatures: a "--" delimiter line ends the body, sign-offs drop the
+    # name lines after them, and mail client footers are cut out
+    kept = []
+    skip_until = -1
+    for index, line in enumerate(body):
+        if index <= skip_until:
+            continue
+        line = line.rstrip()
+        if line.strip() == '--':
+            break
+        lowered = line.lower()
+        sign_off = _SIGN_OFF_RE.search(line)
+        if sign_off:
+            end = _signature_end(body, index)
+            if end >= 0:
+                kept.append(line[:sign_off.start()].rstrip())
+                skip_until = end
+                continue
+        if 'sent from my ' in lowered or 'get outlook for ' in lowered:
+            line = _CLIENT_FOOTER_RE.sub('', line).rstrip()
+        kept.append(line)
+    
+    # Collapse blank runs left behind by removed lines
+    cleaned_lines = []
+    for line in kept:
+        if line or (cleaned_lines and cleaned_lines[-1]):
+            cleaned_lines.append(line)
+    
+    return '\n'.join(cleaned_lines).strip()
 
 
 def structural_cleanup(email_text: str) -> str:
     """
     Perform complete structural cleanup of email.
     """
-    text = remove_html_tags(email_text)
-    text = remove_email_headers(text)
-    text = remove_quoted_text(text)
-    text = remove_signatures(text)
-    text = normalize_whitespace(text)
-    return text
+    return _clean_lines(remove_html_tags(email_text))
 
 
 def clean_and_extract(email_text: str) -> Tuple[str, Dict]:
@@ -160,11 +213,6 @@ def clean_and_extract(email_text: str) -> Tuple[str, Dict]:
     Returns:
         Tuple of (cleaned_text, metadata_dict)
     """
-    # Extract metadata first
-    metadata = extract_metadata(email_text)
-    
-    # Then clean the text
-    cleaned = structural_cleanup(email_text)
-    
-    return cleaned, metadata
-
+    # Plain text and HTML share the header-block metadata rule and the line
+    # walker; only HTML goes through BeautifulSoup first
+    return structural_cleanup(email_text), extract_metadata(email_text)
@@ -1,8 +1,12 @@
+import sys
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from datetime import datetime
 
-@dataclass
+# Slotted dataclasses need Python 3.10+; older interpreters fall back to __dict__
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
 class EmailMetadata:
     """Email metadata structure."""
     subject: str = ""
@@ -16,11 +20,11 @@ class EmailMetadata:
             'subject': self.subject,
             'from': self.from_address,
             'to': self.to_addresses,
-            'date': self.date.isoformat() if self.date else None,
+            'date': self.date.isoformat() if isinstance(self.date, datetime) else self.date,
             'thread_id': self.thread_id
         }
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class ActionItem:
     """Action item structure."""
     text: str
@@ -36,7 +40,7 @@ class ActionItem:
             'confidence': self.confidence
         }
 
-@dataclass
+@dataclass(**_SLOTS)
 class EmailSummary:
     """Email summary structure."""
     summary: str
@@ -50,7 +54,7 @@ class EmailSummary:
             'tone': self.tone
         }
 
-@dataclass
+@dataclass(**_SLOTS)
 class PriorityInfo:
     """Priority information structure."""
     score: float
@@ -66,7 +70,7 @@ class PriorityInfo:
             'breakdown': self.breakdown
         }
 
-@dataclass
+@dataclass(**_SLOTS)
 class ProcessedEmail:
     """Complete processed email result."""
     original_text: str
@@ -91,28 +95,90 @@ class ProcessedEmail:
     
     def generate_focus_mode(self) -> str:
         """Generate focus mode text with only critical information."""
-        focus_parts = []
-        
-        # Priority indicator
-        if self.priority and self.priority.score >= 50:
-            focus_parts.append(f"⚠️ {self.priority.level.upper()} PRIORITY\n")
-        
-        # Summary
-        focus_parts.append(f"📋 {self.summary.summary}\n")
-        
-        # Action items
-        if self.action_items:
-            focus_parts.append("\n✅ ACTION ITEMS:")
-            for i, item in enumerate(self.action_items, 1):
-                deadline_info = f" (Due: {item.deadline})" if item.deadline != "none" else ""
-                assignee_info = f" [@{item.assignee}]" if item.assignee != "unspecified" else ""
-                focus_parts.append(f"{i}. {item.text}{deadline_info}{assignee_info}")
-        
-        # Key points
-        if self.summary.key_points:
-            focus_parts.append("\n🔑 KEY POINTS:")
-            for point in self.summary.key_points:
-                focus_parts.append(f"• {point}")
-        
-        self.focus_mode_text = '\n'.join(focus_parts)
+        self.focus_mode_text = build_focus_mode(
+            self.summary.to_dict(),
+            [item.to_dict() for item in self.action_items],
+            self.priority.to_dict() if self.priority else None
+        )
         return self.focus_mode_text
+
+
+def build_focus_mode(summary: Dict, action_items: List[Dict], priority: Optional[Dict]) -> str:
+    """Generate focus mode text from plain result dicts."""
+    focus_parts = []
+    
+    # Priority indicator
+    if priority and priority['score'] >= 50:
+        focus_parts.append(f"⚠️ {priority['level'].upper()} PRIORITY\n")
+    
+    # Summary
+    focus_parts.append(f"📋 {summary['summary']}\n")
+    
+    # Action items
+    if action_items:
+        focus_parts.append("\n✅ ACTION ITEMS:")
+        for i, item in enumerate(action_items, 1):
+            deadline_info = f" (Due: {item['deadline']})" if item['deadline'] != "none" else ""
+            assignee_info = f" [@{item['assignee']}]" if item['assignee'] != "unspecified" else ""
+            focus_parts.append(f"{i}. {item['text']}{deadline_info}{assignee_info}")
+    
+    # Key points
+    if summary['key_points']:
+        focus_parts.append("\n🔑 KEY POINTS:")
+        for point in summary['key_points']:
+            focus_parts.append(f"• {point}")
+    
+    return '\n'.join(focus_parts)
+
+
+def build_response_dict(
+    original_text: str,
+    cleaned_text: str,
+    metadata: Dict,
+    summary: Dict,
+    action_items: List[Dict],
+    priority: Dict
+) -> Dict:
+    """
+    Build the API result dict directly from processor output.
+    
+    Produces the same shape as ProcessedEmail.to_dict() (with focus mode text
+    filled in) without constructing the intermediate dataclasses.
+    """
+    date = metadata.get('date')
+    summary_out = {
+        'summary': summary.get('summary', ''),
+        'key_points': summary.get('key_points', []),
+        'tone': summary.get('tone', 'professional')
+    }
+    action_items_out = [
+        {
+            'text': item.get('text', ''),
+            'assignee': item.get('assignee', 'unspecified'),
+            'deadline': item.get('deadline', 'none'),
+            'confidence': item.get('confidence', 'medium')
+        }
+        for item in action_items
+    ]
+    priority_out = {
+        'score': priority.get('score', 0),
+        'level': priority.get('level', 'low'),
+        'color': priority.get('color', '#6b7280'),
+        'breakdown': priority.get('breakdown', {})
+    }
+    
+    return {
+        'original_text': original_text,
+        'cleaned_text': cleaned_text,
+        'metadata': {
+            'subject': metadata.get('subject', ''),
+            'from': metadata.get('from', ''),
+            'to': metadata.get('to', []),
+            'date': date.isoformat() if isinstance(date, datetime) else date,
+            'thread_id': None
+        },
+        'summary': summary_out,
+        'action_items': action_items_out,
+        'priority': priority_out,
+        'focus_mode_text': build_focus_mode(summary_out, action_items_out, priority_out)
+    }
@@ -1,7 +1,37 @@
 import re
-from typing import Dict, List
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
+from comp.models import _SLOTS
 
+
+def _build_keyword_index(categories: Dict[str, List[str]]):
+    """
+    Build a single scanner for several keyword categories.
+    
+    Returns a pattern reporting every keyword occurrence (overlaps included),
+    a map from each keyword to the keywords a match on it implies (itself plus
+    any keyword that is a prefix of it), and a map from keyword to categories.
+    """
+    keyword_categories = {}
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            keyword_categories.setdefault(keyword, []).append(category)
+    
+    ordered = sorted(keyword_categories, key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in ordered) + '))')
+    implied = {
+        keyword: tuple(other for other in ordered if keyword.startswith(other))
+        for keyword in ordered
+    }
+    return pattern, implied, {k: tuple(v) for k, v in keyword_categories.items()}
+
+
+@dataclass(frozen=True, eq=False, **_SLOTS)
 class PriorityScorer:
     """Calculate priority scores for emails based on multiple signals."""
     
@@ -20,14 +50,45 @@ class PriorityScorer:
         'manager', 'lead', 'head'
     ]
     
-    def __init__(self):
-        self.weights = {
-            'urgency': 0.30,
-            'importance': 0.25,
-            'action_density': 0.20,
-            'sender_importance': 0.15,
-            'time_sensitivity': 0.10
-        }
+    # Single-scan matchers for short strings (subject line, sender)
+    _URGENT_RE = re.compile('|'.join(re.escape(keyword) for keyword in URGENT_KEYWORDS))
+    _VIP_RE = re.compile('|'.join(re.escape(term) for term in VIP_DOMAINS))
+    
+    DEADLINE_KEYWORDS = ['deadline', 'due', 'by end of', 'before', 'until']
+    
+    # One scan of the body finds which keywords of every category are present
+    _KEYWORD_RE, _KEYWORD_IMPLIES, _KEYWORD_CATEGORIES = _build_keyword_index({
+        'urgent': URGENT_KEYWORDS,
+        'important': IMPORTANT_KEYWORDS,
+        'deadline': DEADLINE_KEYWORDS
+    })
+    
+    CACHE_SIZE = 4096
+    
+    # Priority buckets: scores below _THRESHOLDS[i] fall into _BUCKETS[i]
+    _THRESHOLDS = (25, 50, 75)
+    _BUCKETS = (
+        ('low', '#6b7280', '⚪ Low Priority'),          # gray
+        ('medium', '#3b82f6', '🔵 Medium Priority'),    # blue
+        ('high', '#f59e0b', '🟠 High Priority'),        # orange
+        ('critical', '#ef4444', '🔴 Critical')          # red
+    )
+    
+    # Time references (today, tomorrow, specific dates), compiled once
+    _TIME_PATTERNS = [
+        re.compile(pattern) for pattern in (
+            r'\btoday\b', r'\btomorrow\b', r'\bthis week\b',
+            r'\d{1,2}/\d{1,2}', r'\d{1,2}-\d{1,2}'
+        )
+    ]
+    
+    # Action item deadline urgency tiers
+    _DEADLINE_HOT_RE = re.compile(r'today|asap|immediately')
+    _DEADLINE_WARM_RE = re.compile(r'tomorrow|this week')
+    
+    # Per-instance state: results keyed by content hash plus every input the score depends on
+    _cache: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False, compare=False)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
     
     def calculate_priority(
         self,
@@ -48,68 +109,187 @@ class PriorityScorer:
         Returns:
             Dictionary with score, level, and breakdown
         """
-        scores = {
-            'urgency': self._score_urgency(email_text, metadata, ai_signals),
-            'importance': self._score_importance(email_text, metadata, ai_signals),
-            'action_density': self._score_action_density(action_items),
-            'sender_importance': self._score_sender(metadata),
-            'time_sensitivity': self._score_time_sensitivity(email_text, action_items)
-        }
+        key = self._cache_key(email_text, metadata, ai_signals, action_items)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            return {**cached, 'breakdown': dict(cached['breakdown'])}
+        
+        urgency, importance, action_density, sender_importance, time_sensitivity = \
+            self._component_scores(email_text, metadata, ai_signals, action_items)
         
         # Calculate weighted total
-        total_score = sum(
-            scores[key] * self.weights[key]
-            for key in scores
+        total_score = self._weighted_total(
+            urgency, importance, action_density, sender_importance, time_sensitivity
         )
         
-        # Determine priority level
-        if total_score >= 75:
-            level = 'critical'
-            color = '#ef4444'  # red
-        elif total_score >= 50:
-            level = 'high'
-            color = '#f59e0b'  # orange
-        elif total_score >= 25:
-            level = 'medium'
-            color = '#3b82f6'  # blue
-        else:
-            level = 'low'
-            color = '#6b7280'  # gray
-        
-        return {
+        level, color = self._priority_level(total_score)
+        
+        scores = {
+            'urgency': urgency,
+            'importance': importance,
+            'action_density': action_density,
+            'sender_importance': sender_importance,
+            'time_sensitivity': time_sensitivity
+        }
+        result = {
             'score': round(total_score, 1),
             'level': level,
             'color': color,
             'breakdown': scores
         }
+        with self._cache_lock:
+            self._cache[key] = {**result, 'breakdown': dict(scores)}
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
     
-    def _score_urgency(self, email_text: str, metadata: Dict, ai_signals: Dict) -> float:
-        """Score urgency (0-100)."""
-        score = 0
+    def score_batch(
+        self,
+        texts: List[str],
+        metadatas: List[Dict] = None,
+        ai_signals_list: List[Dict] = None,
+        action_items_list: List[List[Dict]] = None
+    ) -> List[Dict]:
+        """
+        Score many emails at once, e.g. a whole inbox.
+        
+        The optional lists are parallel to texts and must match its length.
+        Results carry score, level and color but skip the per-category breakdown.
+        """
+        count = len(texts)
+        metadatas = [None] * count if metadatas is None else metadatas
+        ai_signals_list = [None] * count if ai_signals_list is None else ai_signals_list
+        action_items_list = [None] * count if action_items_list is None else action_items_list
+        if not len(metadatas) == len(ai_signals_list) == len(action_items_list) == count:
+            raise ValueError("score_batch lists must all have the same length as texts")
+        
+        results = []
+        for email_text, metadata, ai_signals, action_items in zip(
+            texts, metadatas, ai_signals_list, action_items_list
+        ):
+            total_score = self._weighted_total(
+                *self._component_scores(email_text, metadata, ai_signals, action_items)
+            )
+            level, color = self._priority_level(total_score)
+            results.append({
+                'score': round(total_score, 1),
+                'level': level,
+                'color': color
+            })
+        
+        return results
+    
+    def _cache_key(
+        self,
+        email_text: str,
+        metadata: Dict,
+        ai_signals: Dict,
+        action_items: List[Dict]
+    ) -> tuple:
+        """Build a result cache key from the email content and scoring inputs."""
+        digest = hashlib.blake2b(email_text.encode('utf-8'), digest_size=16).digest()
+        metadata = metadata or {}
+        ai_signals = ai_signals or {}
+        return (
+            digest,
+            metadata.get('from'),
+            metadata.get('subject', ''),
+            ai_signals.get('urgency'),
+            ai_signals.get('importance'),
+            tuple(
+                (item.get('confidence'), item.get('deadline', 'none'))
+                for item in action_items or ()
+            )
+        )
+    
+    def _component_scores(
+        self,
+        email_text: str,
+        metadata: Dict,
+        ai_signals: Dict,
+        action_items: List[Dict]
+    ) -> Tuple[float, float, float, float, float]:
+        """Score urgency, importance, action density, sender and time sensitivity."""
+        # Lowercase once; every helper works on these copies
         text_lower = email_text.lower()
         subject_lower = metadata.get('subject', '').lower() if metadata else ''
+        sender_lower = metadata['from'].lower() if metadata and 'from' in metadata else None
+        keyword_counts = self._count_keywords(text_lower)
+        
+        return (
+            self._score_urgency(keyword_counts['urgent'], subject_lower, ai_signals),
+            self._score_importance(
+                keyword_counts['important'], keyword_counts['exclamation'], ai_signals
+            ),
+            self._score_action_density(action_items),
+            self._score_sender(sender_lower),
+            self._score_time_sensitivity(text_lower, keyword_counts['deadline'], action_items)
+        )
+    
+    @staticmethod
+    def _weighted_total(
+        urgency: float, importance: float, action_density: float,
+        sender_importance: float, time_sensitivity: float
+    ) -> float:
+        """Combine the component scores with fixed weights (they sum to 1)."""
+        return (
+            urgency * 0.30
+            + importance * 0.25
+            + action_density * 0.20
+            + sender_importance * 0.15
+            + time_sensitivity * 0.10
+        )
+    
+    def _priority_level(self, total_score: float) -> Tuple[str, str]:
+        """Map a total score to its priority level and display color."""
+        level, color, _ = self._BUCKETS[bisect.bisect_right(self._THRESHOLDS, total_score)]
+        return level, color
+    
+    def _count_keywords(self, text_lower: str) -> Dict[str, int]:
+        """
+        Count the distinct keywords of each category present in the text, plus
+        the total number of exclamation marks.
+        """
+        # The scan only has to collect distinct keywords; prefix expansion and
+        # category lookups then run once per keyword instead of once per match
+        matched = {match.group(1) for match in self._KEYWORD_RE.finditer(text_lower)}
+        found = set()
+        for keyword in matched:
+            found.update(self._KEYWORD_IMPLIES[keyword])
+        
+        counts = {'urgent': 0, 'important': 0, 'deadline': 0, 'exclamation': text_lower.count('!')}
+        for keyword in found:
+            for category in self._KEYWORD_CATEGORIES[keyword]:
+                counts[category] += 1
+        return counts
+    
+    def _score_urgency(self, urgent_count: int, subject_lower: str, ai_signals: Dict) -> float:
+        """Score urgency (0-100)."""
+        score = 0
         
         # Check for urgent keywords
-        urgent_count = sum(1 for keyword in self.URGENT_KEYWORDS if keyword in text_lower)
-        score += min(urgent_count * 20, 60)
+        score += (urgent_count if urgent_count < 3 else 3) * 20  # capped at 60
         
         # Subject line urgency
-        if any(keyword in subject_lower for keyword in self.URGENT_KEYWORDS):
+        if self._URGENT_RE.search(subject_lower):
             score += 30
         
         # AI-detected urgency
         if ai_signals and ai_signals.get('urgency') == 'urgent':
             score += 40
         
-        return min(score, 100)
+        return score if score < 100 else 100
     
-    def _score_importance(self, email_text: str, metadata: Dict, ai_signals: Dict) -> float:
+    def _score_importance(
+        self, important_count: int, exclamation_count: int, ai_signals: Dict
+    ) -> float:
         """Score importance (0-100)."""
         score = 0
-        text_lower = email_text.lower()
         
         # Check for important keywords
-        important_count = sum(1 for keyword in self.IMPORTANT_KEYWORDS if keyword in text_lower)
         score += min(important_count * 15, 50)
         
         # AI-detected importance
@@ -121,10 +301,9 @@ class PriorityScorer:
                 score += 30
         
         # Exclamation marks (but cap it to avoid spam)
-        exclamation_count = email_text.count('!')
-        score += min(exclamation_count * 5, 20)
+        score += (exclamation_count if exclamation_count < 4 else 4) * 5  # capped at 20
         
-        return min(score, 100)
+        return score if score < 100 else 100
     
     def _score_action_density(self, action_items: List[Dict]) -> float:
         """Score based on number and confidence of action items (0-100)."""
@@ -134,79 +313,65 @@ class PriorityScorer:
         score = 0
         
         # Base score for having actions
-        score += min(len(action_items) * 20, 60)
+        action_count = len(action_items)
+        score += (action_count if action_count < 3 else 3) * 20  # capped at 60
         
         # Bonus for high-confidence actions
-        high_confidence = sum(1 for item in action_items if item.get('confidence') == 'high')
+        high_confidence = [item.get('confidence') for item in action_items].count('high')
         score += min(high_confidence * 15, 40)
         
-        return min(score, 100)
+        return score if score < 100 else 100
     
-    def _score_sender(self, metadata: Dict) -> float:
+    def _score_sender(self, sender_lower: str) -> float:
         """Score sender importance (0-100)."""
-        if not metadata or 'from' not in metadata:
+        if sender_lower is None:
             return 50  # Default neutral score
         
-        sender = metadata['from'].lower()
         score = 50  # Base score
         
         # Check for VIP titles
-        for vip_term in self.VIP_DOMAINS:
-            if vip_term in sender:
-                score += 30
-                break
+        if self._VIP_RE.search(sender_lower):
+            score += 30
         
         # External vs internal (simple heuristic)
-        if '@' in sender:
+        if '@' in sender_lower:
             # Could be enhanced with company domain checking
             pass
         
-        return min(score, 100)
+        return score if score < 100 else 100
     
-    def _score_time_sensitivity(self, email_text: str, action_items: List[Dict]) -> float:
+    def _score_time_sensitivity(
+        self, text_lower: str, deadline_count: int, action_items: List[Dict]
+    ) -> float:
         """Score time sensitivity based on deadlines (0-100)."""
         score = 0
         
         # Check for deadline-related keywords
-        deadline_keywords = ['deadline', 'due', 'by end of', 'before', 'until']
-        text_lower = email_text.lower()
-        
-        for keyword in deadline_keywords:
-            if keyword in text_lower:
-                score += 20
+        score += deadline_count * 20
         
         # Check action items for deadlines
         if action_items:
+            hot_re = self._DEADLINE_HOT_RE
+            warm_re = self._DEADLINE_WARM_RE
             for item in action_items:
                 deadline = item.get('deadline', 'none')
                 if deadline and deadline != 'none':
-                    # Try to parse deadline urgency
-                    if any(word in deadline.lower() for word in ['today', 'asap', 'immediately']):
+                    # Try to parse deadline urgency (each item counts once)
+                    deadline = deadline.lower()
+                    if hot_re.search(deadline):
                         score += 40
-                    elif any(word in deadline.lower() for word in ['tomorrow', 'this week']):
+                    elif warm_re.search(deadline):
                         score += 30
                     else:
                         score += 20
         
         # Look for time patterns (today, tomorrow, specific dates)
-        time_patterns = [
-            r'\btoday\b', r'\btomorrow\b', r'\bthis week\b',
-            r'\d{1,2}/\d{1,2}', r'\d{1,2}-\d{1,2}'
-        ]
-        
-        for pattern in time_patterns:
-            if re.search(pattern, text_lower):
+        for pattern in self._TIME_PATTERNS:
+            if pattern.search(text_lower):
                 score += 15
         
-        return min(score, 100)
+        return score if score < 100 else 100
     
     def get_priority_label(self, score: float) -> str:
         """Get human-readable priority label."""
-        if score >= 75:
-            return '🔴 Critical'
-        elif score >= 50:
-            return '🟠 High Priority'
-        elif score >= 25:
-            return '🔵 Medium Priority'
-        else:
-            return '⚪ Low Priority'
+        return self._BUCKETS[bisect.bisect_right(self._THRESHOLDS, score)][2]
@@ -1,29 +1,58 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+
+def load_env() -> None:
+    """Load .env into the environment once per process tree."""
+    if not os.environ.get('_DOTENV_LOADED'):
+        load_dotenv()
+        os.environ['_DOTENV_LOADED'] = '1'
+
+
+class _EnvSetting:
+    """Config attribute read from the environment on first access, then cached."""
+    
+    def __init__(self, name: str, default: str, parse=None):
+        self.name = name
+        self.default = default
+        self.parse = parse
+        self.loaded = False
+        self.value = None
+    
+    def __get__(self, instance, owner):
+        if not self.loaded:
+            load_env()
+            value = os.getenv(self.name, self.default)
+            self.value = self.parse(value) if self.parse else value
+            self.loaded = True
+        return self.value
+
 
 class Config:
     """Application configuration."""
     
     # Flask settings
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
-    HOST = os.getenv('HOST', '0.0.0.0')
-    PORT = int(os.getenv('PORT', 5000))
+    SECRET_KEY = _EnvSetting('SECRET_KEY', 'dev-secret-key-change-in-production')
+    DEBUG = _EnvSetting('DEBUG', 'True', lambda value: value.lower() == 'true')
+    HOST = _EnvSetting('HOST', '0.0.0.0')
+    PORT = _EnvSetting('PORT', '5000', int)
     
     # AI settings
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+    GEMINI_API_KEY = _EnvSetting('GEMINI_API_KEY', '')
+    
+    # Worker processes for the no-AI pipeline in each server process
+    # (0 = all cores; with several server workers use cores / workers)
+    CPU_WORKERS = _EnvSetting('CPU_WORKERS', '0', int)
     
     # CORS settings
-    CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
+    CORS_ORIGINS = _EnvSetting('CORS_ORIGINS', '*', lambda value: value.split(','))
     
     # File upload settings
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max file size
-    ALLOWED_EXTENSIONS = {'txt', 'eml', 'msg'}
+    ALLOWED_EXTENSIONS = frozenset({'txt', 'eml', 'msg'})
     
     @staticmethod
     def allowed_file(filename: str) -> bool:
         """Check if file extension is allowed."""
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+        _, dot, extension = filename.rpartition('.')
+        return bool(dot) and extension.lower() in Config.ALLOWED_EXTENSIONS
@@ -0,0 +1,178 @@
+import random
+
+import pytest
+
+from comp.cleaner import _looks_like_html, clean_and_extract, extract_metadata, structural_cleanup
+from sample_emails import get_all_samples
+
+
+FUZZ_SEED = 20240101
+FUZZ_CASES = 500
+
+_WORDS = (
+    'report', 'deadline', 'budget', 'meeting', 'review', 'draft', 'client',
+    'please', 'send', 'update', 'schedule', 'numbers', 'slides', 'today',
+)
+_NAMES = ('Jane Doe', 'Bob Smith', 'Priya Nair', 'Li Wei')
+_OPENERS = ('On it,', 'On Monday', 'On second thought,', 'Online')
+
+
+def _sentence(rng, token):
+    words = rng.sample(_WORDS, rng.randint(3, 7))
+    if rng.random() < 0.2:
+        words.insert(0, rng.choice(_OPENERS))
+    return ' '.join(words + [token]) + '.'
+
+
+def _fuzz_email(rng, index):
+    """
+    Build a realistic email plus the body tokens that must survive cleaning
+    and the tokens that must not.
+    """
+    kept, dropped = [], []
+    parts = []
+    headers = {}
+
+    # Step 1: optional header block, possibly after transport noise
+    if rng.random() < 0.7:
+        lines = []
+        if rng.random() < 0.3:
+            lines += [f"Received: from mx{i}.example.com" for i in range(rng.randint(1, 5))]
+        headers = {
+            'subject': f"Subject {index}",
+            'from': f"{rng.choice(_NAMES)} <s{index}@example.com>",
+        }
+        lines += [f"Subject: {headers['subject']}", f"From: {headers['from']}"]
+        if rng.random() < 0.5:
+            lines.append("X-Mailer: Fuzz 1.0")
+        parts.append('\n'.join(lines))
+
+    # Step 2: greeting and body paragraphs
+    parts.append(rng.choice(('Hi team,', 'Hello,', 'Hey Bob,')))
+    for paragraph in range(rng.randint(1, 3)):
+        token = f"KEEP{index}x{paragraph}"
+        kept.append(token)
+        parts.append('\n'.join(
+            _sentence(rng, token) for _ in range(rng.randint(1, 3))
+        ))
+
+    # Step 3: sign-off, quoted reply and forwarded message
+    if rng.random() < 0.5:
+        parts.append(f"Thanks,\n{rng.choice(_NAMES)}")
+    if rng.random() < 0.4:
+        token = f"QUOTED{index}"
+        dropped.append(token)
+        attribution = "On Mon, Jan 1, 2024 at 10:00 AM Bob <bob@x.com> wrote:"
+        if rng.random() < 0.3:
+            attribution = attribution.replace(' wrote:', '\nwrote:')
+        parts.append(f"{attribution}\n> {token} earlier\n> more {token}")
+    if rng.random() < 0.3:
+        token = f"FWDHDR{index}"
+        dropped.append(token)
+        parts.append(
+            f"---------- Forwarded message ---------\n"
+            f"From: {token} <ceo@acme.com>\nSubject: Forwarded {token}"
+        )
+
+    email_text = '\n\n'.join(parts)
+    if rng.random() < 0.2:
+        email_text = email_text.replace('\n', ' \n')
+    return email_text, kept, dropped, headers
+
+
+def _fuzz_cases():
+    rng = random.Random(FUZZ_SEED)
+    return [_fuzz_email(rng, index) for index in range(FUZZ_CASES)]
+
+
+@pytest.mark.parametrize('key', list(get_all_samples()))
+def test_samples_match_structural_cleanup(key):
+    email_text = get_all_samples()[key]
+    cleaned, metadata = clean_and_extract(email_text)
+    assert cleaned == structural_cleanup(email_text)
+    assert metadata == extract_metadata(email_text)
+
+
+def test_fuzzed_emails_match_structural_cleanup():
+    for email_text, kept, dropped, headers in _fuzz_cases():
+        cleaned, metadata = clean_and_extract(email_text)
+        assert cleaned == structural_cleanup(email_text), email_text
+        assert metadata == extract_metadata(email_text), email_text
+
+        for token in kept:
+            assert token in cleaned, email_text
+        for token in dropped:
+            assert token not in cleaned, email_text
+        assert not any(line.startswith('>') or line != line.rstrip()
+                       for line in cleaned.split('\n')), email_text
+        assert '\n\n\n' not in cleaned
+
+        if headers:
+            assert metadata['subject'] == headers['subject']
+            assert metadata['from'] == headers['from']
+
+
+def test_on_it_line_is_not_an_attribution():
+    email_text = (
+        "Hi team,\n\nOn it, will send by Friday.\n\n"
+        "On Mon, Jan 1, 2024 at 10:00 AM Bob <bob@x.com> wrote:\n> earlier"
+    )
+    cleaned, _ = clean_and_extract(email_text)
+    assert cleaned == "Hi team,\n\nOn it, will send by Friday."
+    assert cleaned == structural_cleanup(email_text)
+
+
+def test_pasted_forward_headers_are_metadata():
+    email_text = (
+        "---------- Forwarded message ---------\n"
+        "From: Jane CEO <ceo@acme.com>\nSubject: URGENT: board deck\n\n"
+        "Need the numbers today."
+    )
+    cleaned, metadata = clean_and_extract(email_text)
+    assert metadata['subject'] == 'URGENT: board deck'
+    assert metadata['from'] == 'Jane CEO <ceo@acme.com>'
+    assert cleaned == "Need the numbers today."
+
+
+@pytest.mark.parametrize('email_text, expected', [
+    (
+        "Hi,\n\nNumbers attached.\n\nBest regards,\nJane Doe\nDirector of Ops\nAcme Corp\n\n"
+        "-----Original Message-----\nFrom: Y\n\nolder",
+        "Hi,\n\nNumbers attached."
+    ),
+    ("Please send the report.\n\nThanks,\n-- \nJohn", "Please send the report.\n\nThanks,"),
+    ("Hello\n\nBody text\n-- \nJohn\nPhone 123\n", "Hello\n\nBody text"),
+    ("ok cheers\nbob", "ok"),
+    ("Got it, many thanks\nBob\n\nP.S. Call me.", "Got it,\n\nP.S. Call me."),
+])
+def test_signatures(email_text, expected):
+    assert structural_cleanup(email_text) == expected
+
+
+def test_html_body_after_long_headers_is_parsed():
+    email_text = "From: a\nX-Long: " + "x" * 1100 + "\n\n<html><body><p>Hello</p></body></html>"
+    cleaned, metadata = clean_and_extract(email_text)
+    assert '<' not in cleaned
+    assert 'Hello' in cleaned
+    assert metadata['from'] == 'a'
+
+
+def test_metadata_after_long_received_block():
+    received = ''.join(
+        f"Received: from mx{i}.example.com by relay with ESMTP id abc{i}\n" for i in range(90)
+    )
+    email_text = received + "Subject: Quarterly results\nFrom: a@b.com\n\n<html><body>Hi</body></html>"
+    _, metadata = clean_and_extract(email_text)
+    assert metadata['subject'] == 'Quarterly results'
+    assert metadata['from'] == 'a@b.com'
+
+
+def test_metadata_header_straddling_4kb_is_not_truncated():
+    padding = "X-Pad: " + "y" * 4084 + "\n"
+    metadata = extract_metadata(padding + "Subject: Quarterly results\n\nbody")
+    assert metadata['subject'] == 'Quarterly results'
+
+
+def test_content_type_is_only_read_from_headers():
+    assert _looks_like_html("Content-Type: text/html\n\n<p>Hi</p>")
+    assert not _looks_like_html("Subject: Docs\n\nSet it to\nContent-Type: text/html\nfor pages.")
@@ -0,0 +1,35 @@
+import pytest
+
+from comp.priority_scorer import PriorityScorer
+
+
+EMAILS = [
+    ("URGENT: the deadline is today, please respond ASAP!", {'subject': 'URGENT', 'from': 'ceo@acme.com'},
+     {'urgency': 'urgent', 'importance': 'critical'}, [{'confidence': 'high', 'deadline': 'today'}]),
+    ("FYI, the newsletter is attached.", {'subject': 'Newsletter'}, None, None),
+    ("Can we meet tomorrow to review the budget?", None, {'importance': 'informational'}, []),
+    ("", None, None, None),
+]
+
+
+def test_score_batch_matches_calculate_priority():
+    scorer = PriorityScorer()
+    texts, metadatas, ai_signals_list, action_items_list = map(list, zip(*EMAILS))
+    batch = scorer.score_batch(texts, metadatas, ai_signals_list, action_items_list)
+    for result, args in zip(batch, EMAILS):
+        single = scorer.calculate_priority(*args)
+        assert result == {key: single[key] for key in ('score', 'level', 'color')}
+
+
+def test_score_batch_without_optional_lists():
+    scorer = PriorityScorer()
+    texts = [email[0] for email in EMAILS]
+    batch = scorer.score_batch(texts)
+    assert [result['score'] for result in batch] == [
+        scorer.calculate_priority(text)['score'] for text in texts
+    ]
+
+
+def test_score_batch_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        PriorityScorer().score_batch(["a", "b"], metadatas=[{}])